@@ -1,148 +1,340 @@
+import functools
+import struct
+import sys
 import time
 import serial
 
+# APT reply layouts (little endian, offsets include the 6 byte header):
+_INFO       = struct.Struct('<6xI8sHI60xH') # MGMSG_HW_GET_INFO
+_STATUSBITS = struct.Struct('<8xI')         # MGMSG_MOT_GET_STATUSBITS
+_VELPARAMS  = struct.Struct('<12xII')       # MGMSG_MOT_GET_VELPARAMS
+_POSCOUNTER = struct.Struct('<6x2si')       # MGMSG_MOT_GET_POSCOUNTER
+_DCSTATUS   = struct.Struct('<8xi4xI')      # MGMSG_MOT_GET_DCSTATUSUPDATE
+                                            # (and MGMSG_MOT_MOVE_COMPLETED)
+
+# APT commands with no variable data (MGMSG_... names, dest 0x50, source 0x01):
+_CMD_REQ_INFO            = b'\x05\x00\x00\x00\x50\x01'
+_CMD_IDENTIFY            = b'\x23\x02\x00\x00\x50\x01'
+_CMD_ENABLE_ON           = b'\x10\x02\x00\x01\x50\x01' # SET_CHANENABLESTATE
+_CMD_ENABLE_OFF          = b'\x10\x02\x00\x02\x50\x01' # SET_CHANENABLESTATE
+_CMD_REQ_CHANENABLESTATE = b'\x11\x02\x00\x00\x50\x01'
+_CMD_REQ_POSCOUNTER      = b'\x11\x04\x00\x00\x50\x01'
+_CMD_REQ_VELPARAMS       = b'\x14\x04\x00\x00\x50\x01'
+_CMD_REQ_STATUSBITS      = b'\x29\x04\x00\x00\x50\x01'
+_CMD_MOVE_HOME           = b'\x43\x04\x00\x00\x50\x01'
+_CMD_REQ_DCSTATUSUPDATE  = b'\x90\x04\x01\x00\x50\x01'
+# APT command headers for commands with data (destination 0x50 | 0x80):
+_HDR_SET_VELPARAMS       = b'\x13\x04\x0E\x00\xd0\x01'
+_HDR_MOVE_ABSOLUTE       = b'\x53\x04\x06\x00\xd0\x01'
+# APT reply message ids (first 2 header bytes):
+_ID_GET_INFO             = b'\x06\x00'
+_ID_GET_CHANENABLESTATE  = b'\x12\x02'
+_ID_GET_POSCOUNTER       = b'\x12\x04'
+_ID_GET_VELPARAMS        = b'\x15\x04'
+_ID_GET_STATUSBITS       = b'\x2A\x04'
+_ID_MOVE_HOMED           = b'\x44\x04'
+_ID_MOVE_COMPLETED       = b'\x64\x04'
+_ID_MOVE_STOPPED         = b'\x66\x04'
+_ID_GET_DCSTATUSUPDATE   = b'\x91\x04'
+
+def _flushes_log(method):
+    # write the buffered verbose output when a public call returns or fails:
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._flush_log()
+    return functools.update_wrapper(wrapper, method)
+
 class Controller:
     '''
     Basic device adaptor for thorlabs KPRM1E Ø1" motorized precision rotation
     stage with DC servo motor driver. Test code runs and seems robust.
     '''
+    EncCnt_per_deg = 1919.6418578623391
+    EncCnt_per_deg_per_s = 42941.66
+    EncCnt_per_deg_per_s2 = 14.66
+    _inv_EncCnt_per_deg = 1 / EncCnt_per_deg
+    _inv_EncCnt_per_deg_per_s = 1 / EncCnt_per_deg_per_s
+    _inv_EncCnt_per_deg_per_s2 = 1 / EncCnt_per_deg_per_s2
+    _move_tol_deg = 0.01 # move tolerance in degrees
+    _tol_counts = int(round(_move_tol_deg * EncCnt_per_deg))
+    _long_timeout_s = 40 # need a lot of time for 360deg move...
+
+    @_flushes_log
     def __init__(
-        self, which_port, name='KPRM1E', verbose=True, very_verbose=False):
+        self, which_port, name='KPRM1E', verbose=True, very_verbose=False,
+        strict=True): # strict -> only accept the tested model and firmware
         self.name = name
         self.verbose = verbose
         self.very_verbose = very_verbose
-        if self.verbose: print("%s: opening..."%self.name, end='')
+        self._log_lines = [] # verbose output, written once per API call
+        self._moves_completed = [] # MOVE_COMPLETED/STOPPED read early
         try:
-            self.port = serial.Serial(
-                port=which_port, baudrate=115200, timeout=1)
+            self.port = serial.Serial( # tiny commands, so non-blocking writes
+                port=which_port, baudrate=115200, timeout=1, write_timeout=0,
+                rtscts=False, dsrdtr=False, xonxoff=False)
         except serial.serialutil.SerialException:
             raise IOError(
                 '%s: no connection on port %s'%(self.name, which_port))
-        if self.verbose: print(" done.")
-        self._get_info()
-        assert self.model_number == 'KDC101\x00\x00'
-        assert self.firmware_v == 131592
-        self.EncCnt_per_deg = 1919.6418578623391
-        self.EncCnt_per_deg_per_s = 42941.66
-        self.EncCnt_per_deg_per_s2 = 14.66
-        self._move_tol_deg = 0.01 # move tolerance in degrees
-        self._long_timeout_s = 40 # need a lot of time for 360deg move...
-        self._set_enable(True)
-        self._get_homed_status()
+        self._set_low_latency()
+        if self.verbose: self._log("%s: opening... done."%self.name)
+        # request the initial state in one go, then parse the replies:
+        info, enable, status_bits, position, velocity = self._pipeline(
+            (_CMD_REQ_INFO,
+             _CMD_REQ_CHANENABLESTATE,
+             _CMD_REQ_STATUSBITS,
+             _CMD_REQ_POSCOUNTER,
+             _CMD_REQ_VELPARAMS),
+            (_ID_GET_INFO,
+             _ID_GET_CHANENABLESTATE,
+             _ID_GET_STATUSBITS,
+             _ID_GET_POSCOUNTER,
+             _ID_GET_VELPARAMS))
+        self._get_info(response=info)
+        if strict:
+            assert self.model_number == 'KDC101\x00\x00'
+            assert self.firmware_v == 131592
+        if not self._get_enable(response=enable):
+            self._set_enable(True, verify=False)
+        self._get_homed_status(response=status_bits)
+        self.position_counts = self._read_position_counts(response=position)
+        self.position_deg = self.position_counts * self._inv_EncCnt_per_deg
+        if self.verbose:
+            self._log('%s: -> position = %0.4fdeg'%(
+                self.name, self.position_deg))
         if not self._homed:
             self._home()
-        self.get_position_deg()
-        self._set_velocity_parameters(25, 25)
+        self._get_velocity_parameters(response=velocity)
+        if (round(self.max_velocity, 1), round(self.acceleration, 1)) != (
+            25, 25):
+            self._set_velocity_parameters(25, 25, verify=False)
         self._moving = False
 
-    def _send(self, cmd, response_bytes=None):
-        if self.very_verbose: print('%s: sending cmd ='%self.name, cmd)
-        self.port.write(cmd)
-        if response_bytes is not None:
-            response = self.port.read(response_bytes)
+    def _log(self, msg):
+        self._log_lines.append(msg)
+        return None
+
+    def _flush_log(self):
+        if self._log_lines:
+            sys.stdout.write('\n'.join(self._log_lines) + '\n')
+            self._log_lines.clear()
+        return None
+
+    def _set_low_latency(self):
+        # USB-serial adapters buffer replies for up to ~16ms by default. On
+        # posix pyserial can set ASYNC_LOW_LATENCY (TIOCGSERIAL/TIOCSSERIAL)
+        # so replies are passed on immediately. Not all platforms/drivers
+        # support it (Windows ports lack the method, other posix raise):
+        try:
+            self.port.set_low_latency_mode(True)
+        except (AttributeError, NotImplementedError, ValueError, IOError):
+            if self.very_verbose:
+                self._log('%s: low latency mode not supported'%self.name)
+        return None
+
+    def _send(self, cmd, response_id=None):
+        if self.very_verbose:
+            self._log('%s: sending cmd = %s'%(self.name, cmd))
+        written = self.port.write(cmd)
+        assert written == len(cmd) # writes are non-blocking
+        if response_id is not None:
+            response = self._read_response(response_id)
         else:
             response = None
-        assert self.port.inWaiting() == 0
-        if self.very_verbose: print('%s: -> response = '%self.name, response)
+        if self.very_verbose:
+            self._log('%s: -> response = %s'%(self.name, response))
+        self._check_unexpected()
         return response
 
-    def _get_info(self): # MGMSG_HW_REQ_INFO
+    def _pipeline(self, cmds, response_ids):
+        # write several requests at once and collect the replies in order,
+        # checking each reply id so a missing/extra message can't shift them:
+        assert len(cmds) == len(response_ids)
+        if self.very_verbose:
+            self._log('%s: sending cmds = %s'%(self.name, cmds))
+        cmd = b''.join(cmds)
+        written = self.port.write(cmd)
+        assert written == len(cmd) # writes are non-blocking
+        responses = [self._read_response(response_id)
+                     for response_id in response_ids]
+        if self.very_verbose:
+            self._log('%s: -> responses = %s'%(self.name, responses))
+        self._check_unexpected()
+        return responses
+
+    def _check_unexpected(self):
+        # drain any whole messages left after a reply (rather than failing):
+        while self.port.inWaiting():
+            self._unsolicited(self._read_response())
+        return None
+
+    def _unsolicited(self, response):
+        # keep the end of a pending move for _finish_move, drop the rest:
+        if response[0:2] in (_ID_MOVE_COMPLETED, _ID_MOVE_STOPPED):
+            self._moves_completed.append(response)
+            if self.very_verbose:
+                self._log('%s: -> end of move = %s'%(self.name, response))
+        elif self.verbose:
+            self._log('%s: -> dropped unexpected message = %s'%(
+                self.name, response))
+        return None
+
+    def _read_move_completed(self): # MGMSG_MOT_MOVE_COMPLETED
+        if not self._moves_completed:
+            self._flush_log() # show progress before waiting for a long move
+            timeout = self.port.timeout
+            self.port.timeout = self._long_timeout_s
+            try:
+                while not self._moves_completed:
+                    self._unsolicited(self._read_response())
+            finally:
+                self.port.timeout = timeout
+        response = self._moves_completed.pop(0)
+        if response[0:2] == _ID_MOVE_STOPPED: # MGMSG_MOT_MOVE_STOPPED
+            self.position_counts, _ = _DCSTATUS.unpack_from(response)
+            self.position_deg = self.position_counts * self._inv_EncCnt_per_deg
+            self._moving = False
+            raise IOError('%s: move stopped before completing'%self.name)
+        return response
+
+    def _read_response(self, response_id=None):
+        # APT messages are a 6 byte header, optionally followed by a data
+        # packet. Bit 7 of the destination byte flags the data packet and
+        # bytes 2-3 then hold its length (little endian):
+        while True:
+            header = self.port.read(6)
+            assert len(header) == 6
+            if header[4] & 0x80:
+                data_length = int.from_bytes(header[2:4], byteorder='little')
+                data = self.port.read(data_length) # blocks until all/timeout
+                assert len(data) == data_length
+            else:
+                data = b''
+            response = header + data
+            if response_id is None or header[0:2] == response_id:
+                return response
+            # messages are framed so skip (or keep) any unsolicited ones,
+            # e.g. a pending move can complete while waiting for a reply:
+            self._unsolicited(response)
+
+    def _get_info(self, response=None): # MGMSG_HW_REQ_INFO
         if self.verbose:
-            print('%s: getting info'%self.name)
-        cmd = b'\x05\x00\x00\x00\x50\x01'
-        response = self._send(cmd, response_bytes=90)
-        self.model_number = response[10:18].decode('ascii')
-        self.type = int.from_bytes(response[18:20], byteorder='little')
-        self.serial_number = int.from_bytes(response[6:10], byteorder='little')
-        self.firmware_v = int.from_bytes(response[20:24], byteorder='little')
-        self.hardware_v = int.from_bytes(response[84:86], byteorder='little')
+            self._log('%s: getting info'%self.name)
+        cmd = _CMD_REQ_INFO
+        if response is None:
+            response = self._send(cmd, _ID_GET_INFO)
+        (self.serial_number, model_number, self.type,
+         self.firmware_v, self.hardware_v) = _INFO.unpack_from(response)
+        self.model_number = model_number.decode('ascii')
         if self.verbose:
-            print('%s: -> model number  = %s'%(self.name, self.model_number))
-            print('%s: -> type          = %s'%(self.name, self.type))
-            print('%s: -> serial number = %s'%(self.name, self.serial_number))
-            print('%s: -> firmware version = %s'%(self.name, self.firmware_v))
-            print('%s: -> hardware version = %s'%(self.name, self.hardware_v))
+            self._log('%s: -> model number  = %s'%(
+                self.name, self.model_number))
+            self._log('%s: -> type          = %s'%(self.name, self.type))
+            self._log('%s: -> serial number = %s'%(
+                self.name, self.serial_number))
+            self._log('%s: -> firmware version = %s'%(
+                self.name, self.firmware_v))
+            self._log('%s: -> hardware version = %s'%(
+                self.name, self.hardware_v))
         return response
 
-    def _get_enable(self): # MGMSG_MOD_REQ_CHANENABLESTATE
+    def _get_enable(self, response=None): # MGMSG_MOD_REQ_CHANENABLESTATE
         if self.verbose:
-            print('%s: getting enable'%self.name)
-        cmd = b'\x11\x02\x00\x00\x50\x01'
-        response = self._send(cmd, response_bytes=6)
+            self._log('%s: getting enable'%self.name)
+        cmd = _CMD_REQ_CHANENABLESTATE
+        if response is None:
+            response = self._send(cmd, _ID_GET_CHANENABLESTATE)
         assert int(response[3]) in (1, 2)
         if int(response[3]) == 1: self.enable = True
         if int(response[3]) == 2: self.enable = False
         if self.verbose:
-            print('%s: -> enable = %s'%(self.name, self.enable))
+            self._log('%s: -> enable = %s'%(self.name, self.enable))
         return self.enable
 
-    def _set_enable(self, enable): # MGMSG_MOD_SET_CHANENABLESTATE
+    @_flushes_log
+    def _set_enable(self, enable, verify=True): # MGMSG_MOD_SET_CHANENABLESTATE
         assert enable in (True, False)
-        if enable:     cmd = b'\x10\x02\x00\x01\x50\x01'
-        if not enable: cmd = b'\x10\x02\x00\x02\x50\x01'
+        cmd = _CMD_ENABLE_ON if enable else _CMD_ENABLE_OFF
         if self.verbose:
-            print('%s: setting enable = %s'%(self.name, enable))
+            self._log('%s: setting enable = %s'%(self.name, enable))
         self._send(cmd)
-        assert self._get_enable() == enable
+        if verify:
+            assert self._get_enable() == enable
+        else:
+            self.enable = enable
         if self.verbose:
-            print('%s: done setting enable'%self.name)
+            self._log('%s: done setting enable'%self.name)
         return None
 
-    def _get_homed_status(self): # MGMSG_MOT_REQ_STATUSBITS
+    def _get_homed_status(self, response=None): # MGMSG_MOT_REQ_STATUSBITS
         if self.verbose:
-            print('%s: getting homed status...'%self.name)
-        cmd = b'\x29\x04\x00\x00\x50\x01'
-        status_bits = self._send(cmd, response_bytes=12)[8:]
-        self._homed = bool(status_bits[1] & 4) # bit mask 0x00000400 = homed
+            self._log('%s: getting homed status...'%self.name)
+        cmd = _CMD_REQ_STATUSBITS
+        if response is None:
+            response = self._send(cmd, _ID_GET_STATUSBITS)
+        status_bits, = _STATUSBITS.unpack_from(response)
+        self._homed = bool(status_bits & 0x00000400) # bit mask for homed
         if self.verbose:
-            print('%s: -> homed = %s'%(self.name, self._homed))
+            self._log('%s: -> homed = %s'%(self.name, self._homed))
         return self._homed
 
+    @_flushes_log
     def _home(self, polling_wait_s=0.1): # MGMSG_MOT_MOVE_HOME
         if self.verbose:
-            print('%s: homing stage...'%self.name)
-        cmd = b'\x43\x04\x00\x00\x50\x01'
-        # response_bytes=6 is not documented, discovered by trial and error
-        # when the 6 bytes return it seems like the home routine is finished!
+            self._log('%s: homing stage...'%self.name)
+        cmd = _CMD_MOVE_HOME
+        # the controller replies with MGMSG_MOT_MOVE_HOMED when homing is done:
+        self._flush_log() # show progress before waiting for homing
         timeout = self.port.timeout
         self.port.timeout = self._long_timeout_s
-        self._send(cmd, response_bytes=6)
+        self._send(cmd, _ID_MOVE_HOMED)
         self.port.timeout = timeout
         # the controller confirms finished when it's not finished, so this
         # block is to ensure the move is finished and the position is correct:
+        wait_s = 0.005 # start polling fast and back off
         while True:
-            if self.verbose: print('.', end='')
-            time.sleep(polling_wait_s)
-            verbose = self.verbose
-            self.verbose = False
-            self.get_position_deg()
-            self.verbose = verbose
-            if round(self.position_deg, 2) == 0:
-                if self.verbose: print('.')
+            position_counts, status_bits = self._get_dc_status()
+            if (not status_bits & 0x00000230 and # moving or homing bits
+                abs(position_counts) <= self._tol_counts):
                 break
+            time.sleep(wait_s)
+            wait_s = min(wait_s * 1.5, polling_wait_s)
+        self.position_counts = position_counts
+        self.position_deg = position_counts * self._inv_EncCnt_per_deg
         if self.verbose:
-            print('%s: -> done homing stage'%self.name)
+            self._log('%s: -> done homing stage (position = %0.4fdeg)'%(
+                self.name, self.position_deg))
         return None
 
-    def _get_velocity_parameters(self): # MGMSG_MOT_GET_VELPARAMS
+    @_flushes_log
+    def _get_velocity_parameters(
+        self, response=None): # MGMSG_MOT_REQ_VELPARAMS
         if self.verbose:
-            print('%s: getting velocity parameters'%self.name)
-        cmd = b'\x14\x04\x00\x00\x50\x01'
-        response = self._send(cmd, response_bytes=20)
-        self.max_velocity = int.from_bytes( # deg/s
-            response[16:20], byteorder='little') / self.EncCnt_per_deg_per_s
-        self.acceleration = int.from_bytes( # deg/s^2
-            response[12:16], byteorder='little') / self.EncCnt_per_deg_per_s2
+            self._log('%s: getting velocity parameters'%self.name)
+        cmd = _CMD_REQ_VELPARAMS
+        if response is None:
+            response = self._send(cmd, _ID_GET_VELPARAMS)
+        acceleration_counts, max_velocity_counts = _VELPARAMS.unpack_from(
+            response)
+        self.max_velocity = (
+            max_velocity_counts * self._inv_EncCnt_per_deg_per_s)
+        self.acceleration = (
+            acceleration_counts * self._inv_EncCnt_per_deg_per_s2)
         if self.verbose:
-            print('%s: -> max velocity = %s'%(self.name, self.max_velocity))
-            print('%s: -> acceleration = %s'%(self.name, self.acceleration))
+            self._log('%s: -> max velocity = %s'%(
+                self.name, self.max_velocity))
+            self._log('%s: -> acceleration = %s'%(
+                self.name, self.acceleration))
         return self.max_velocity, self.acceleration
 
-    def _set_velocity_parameters(self, max_velocity, acceleration):
+    @_flushes_log
+    def _set_velocity_parameters(
+        self, max_velocity, acceleration, verify=True):
         if self.verbose:
-            print('%s: setting velocity parameters:'%self.name)
-            print('%s: -> max velocity = %s'%(self.name, max_velocity))
-            print('%s: -> acceleration = %s'%(self.name, acceleration))
+            self._log('%s: setting velocity parameters:'%self.name)
+            self._log('%s: -> max velocity = %s'%(self.name, max_velocity))
+            self._log('%s: -> acceleration = %s'%(self.name, acceleration))
         assert 0 <= max_velocity <= 25
         assert 0 <= acceleration <= 25
         max_velocity_counts = int(round(
@@ -150,87 +342,142 @@ class Controller:
         acceleration_counts = int(round(
             acceleration * self.EncCnt_per_deg_per_s2))
         # MGMSG_MOT_SET_VELPARAMS
-        d = bytes([b'\x50'[0] | b'\x80'[0]]) # 'destination byte'
         min_velocity_counts = 0
-        m = min_velocity_counts.to_bytes(4, byteorder='little', signed=True)
-        v = max_velocity_counts.to_bytes(4, byteorder='little', signed=True)
-        a = acceleration_counts.to_bytes(4, byteorder='little', signed=True)
-        cmd = (b'\x13\x04\x0E\x00' + d + b'\x01' + self.ch_id_bytes + m + a + v)
+        cmd = _HDR_SET_VELPARAMS + self.ch_id_bytes + struct.pack(
+            '<iii', min_velocity_counts, acceleration_counts,
+            max_velocity_counts)
         self._send(cmd)
-        self._get_velocity_parameters()
-        assert round(self.max_velocity, 1) == max_velocity
-        assert round(self.acceleration, 1) == acceleration
+        if verify:
+            self._get_velocity_parameters()
+            assert round(self.max_velocity, 1) == max_velocity
+            assert round(self.acceleration, 1) == acceleration
+        else:
+            self.max_velocity = max_velocity
+            self.acceleration = acceleration
         if self.verbose:
-            print('%s: done setting velocity parameters'%self.name)
+            self._log('%s: done setting velocity parameters'%self.name)
         return None
 
+    @_flushes_log
     def identify(self): # MGMSG_MOD_IDENTIFY
         if self.verbose:
-            print('%s: -> flashing front panel LEDs'%self.name)
-        cmd = b'\x23\x02\x00\x00\x50\x01'
+            self._log('%s: -> flashing front panel LEDs'%self.name)
+        cmd = _CMD_IDENTIFY
         self._send(cmd)
         return None
 
-    def get_position_deg(self): # MGMSG_MOT_REQ_POSCOUNTER
+    def _read_position_counts(self, response=None): # MGMSG_MOT_REQ_POSCOUNTER
+        cmd = _CMD_REQ_POSCOUNTER
+        if response is None:
+            response = self._send(cmd, _ID_GET_POSCOUNTER)
+        self.ch_id_bytes, position_counts = _POSCOUNTER.unpack_from(response)
+        return position_counts
+
+    @_flushes_log
+    def get_position_deg(self):
         if self.verbose:
-            print('%s: getting position'%self.name)
-        cmd = b'\x11\x04\x00\x00\x50\x01'
-        response = self._send(cmd, response_bytes=12)
-        self.ch_id_bytes = response[6:8]
-        self.position_counts = int.from_bytes(
-            response[8:12], byteorder='little')
-        self.position_deg = self.position_counts / self.EncCnt_per_deg
+            self._log('%s: getting position'%self.name)
+        self.position_counts = self._read_position_counts()
+        self.position_deg = self.position_counts * self._inv_EncCnt_per_deg
         if self.verbose:
-            print('%s: -> position = %0.4fdeg'%(self.name, self.position_deg))
+            self._log('%s: -> position = %0.4fdeg'%(
+                self.name, self.position_deg))
         return self.position_deg
 
+    def _get_dc_status(self): # MGMSG_MOT_REQ_DCSTATUSUPDATE
+        cmd = _CMD_REQ_DCSTATUSUPDATE
+        response = self._send(cmd, _ID_GET_DCSTATUSUPDATE)
+        position_counts, status_bits = _DCSTATUS.unpack_from(response)
+        return position_counts, status_bits
+
+    @_flushes_log
     def _finish_move(self, polling_wait_s=0.1):
         if not self._moving: return
-        timeout = self.port.timeout
-        self.port.timeout = self._long_timeout_s
-        self.port.read(20) # collect bytes to confirm move (could parse too...)
-        self.port.timeout = timeout
+        response = self._read_move_completed()
+        position_counts, status_bits = _DCSTATUS.unpack_from(response)
         # the controller confirms finished when it's not finished, so this
         # block is to ensure the move is finished and the position is correct:
+        target, tol = self._target_position_counts, self._tol_counts
+        wait_s = 0.005 # start polling fast and back off (short moves finish)
         while True:
-            if self.verbose: print('.', end='')
-            time.sleep(polling_wait_s)
-            verbose = self.verbose
-            self.verbose = False
-            self.get_position_deg()
-            self.verbose = verbose
-            target, tol = self._target_position_deg, self._move_tol_deg
-            if target - tol <= self.position_deg <= target + tol:
-                if self.verbose: print('.')
+            if (not status_bits & 0x00000030 and # moving fwd/rev bits
+                abs(position_counts - target) <= tol):
                 break
+            time.sleep(wait_s)
+            wait_s = min(wait_s * 1.5, polling_wait_s)
+            position_counts, status_bits = self._get_dc_status()
+        self.position_counts = position_counts
+        self.position_deg = position_counts * self._inv_EncCnt_per_deg
         self._moving = False
         if self.verbose:
-            print('%s: -> finished moving'%(self.name))
+            self._log('%s: -> finished moving'%(self.name))
         return None
 
+    @_flushes_log
     def move_deg(self, move_deg, relative=True, block=True):
         if self._moving: self._finish_move()
         if self.verbose:
-            print('%s: moving = %0.4fdeg (relative=%s)'%(
+            self._log('%s: moving = %0.4fdeg (relative=%s)'%(
                 self.name, move_deg, relative))
         if relative: move_deg = self.position_deg + move_deg
         assert 0 <= move_deg <= 359.99
-        position_counts = int(round(move_deg * self.EncCnt_per_deg)) # integer
+        # move_deg >= 0 so truncating x + 0.5 rounds to the nearest count:
+        self._target_position_counts = int(
+            move_deg * self.EncCnt_per_deg + 0.5)
         # MGMSG_MOT_MOVE_ABSOLUTE
-        d = bytes([b'\x50'[0] | b'\x80'[0]]) # 'destination byte'
-        p = position_counts.to_bytes(4, byteorder='little', signed=True)
-        cmd = (b'\x53\x04\x06\x00' + d + b'\x01' + self.ch_id_bytes + p)
+        cmd = (_HDR_MOVE_ABSOLUTE + self.ch_id_bytes +
+               struct.pack('<i', self._target_position_counts))
         self._send(cmd)
         self._moving = True
-        self._target_position_deg = move_deg
         if block:
             self._finish_move()
         return None
 
+    @_flushes_log
+    def move_deg_sequence(self, moves_deg, relative=True, block=True):
+        # each move is sent the moment the previous MOVE_COMPLETED arrives
+        # (skipping the settling check) and only the final move is finished
+        # with _finish_move. Sending early is avoided since a new move
+        # would retarget the one in progress rather than queue behind it.
+        if self._moving: self._finish_move()
+        if self.verbose:
+            self._log('%s: moving sequence = %s (relative=%s)'%(
+                self.name, moves_deg, relative))
+        assert len(moves_deg) > 0
+        targets_counts = []
+        move_deg = self.position_deg
+        for m in moves_deg:
+            move_deg = move_deg + m if relative else m
+            assert 0 <= move_deg <= 359.99
+            targets_counts.append(int(move_deg * self.EncCnt_per_deg + 0.5))
+        completed = bytearray()
+        for i, target_counts in enumerate(targets_counts):
+            if i > 0: # the previous move has completed
+                completed += self._read_move_completed()
+            # MGMSG_MOT_MOVE_ABSOLUTE
+            cmd = (_HDR_MOVE_ABSOLUTE + self.ch_id_bytes +
+                   struct.pack('<i', target_counts))
+            self._send(cmd)
+        # parse the collected MOVE_COMPLETED replies in one pass:
+        for position_counts, _ in _DCSTATUS.iter_unpack(completed):
+            if self.verbose:
+                self._log('%s: -> passed position = %0.4fdeg'%(
+                    self.name, position_counts * self._inv_EncCnt_per_deg))
+        if completed:
+            self.position_counts, _ = _DCSTATUS.unpack_from(
+                completed, len(completed) - _DCSTATUS.size)
+            self.position_deg = (
+                self.position_counts * self._inv_EncCnt_per_deg)
+        self._moving = True
+        self._target_position_counts = targets_counts[-1]
+        if block:
+            self._finish_move()
+        return None
+
+    @_flushes_log
     def close(self):
-        if self.verbose: print("%s: closing..."%self.name, end=' ')
         self.port.close()
-        if self.verbose: print("done.")
+        if self.verbose: self._log("%s: closing... done."%self.name)
         return None
 
 if __name__ == '__main__':
@@ -252,6 +499,9 @@ if __name__ == '__main__':
     for moves in range(3):
         move = mount.move_deg(-10)
 
+    print('\n# Move sequence:')
+    mount.move_deg_sequence((10, 20, 30, 0), relative=False)
+
     print('\n# Non-blocking move:')
     mount.move_deg(10, relative=False, block=False)
     mount.move_deg( 0, relative=False, block=False)